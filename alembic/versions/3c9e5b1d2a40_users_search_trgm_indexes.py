@@ -0,0 +1,46 @@
+"""users search trgm indexes
+
+Revision ID: 3c9e5b1d2a40
+Revises: 7b15cd70af4f
+Create Date: 2026-10-19 10:14:02.518334
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '3c9e5b1d2a40'
+down_revision: Union[str, Sequence[str], None] = '7b15cd70af4f'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+SEARCH_COLUMNS = ('email', 'first_name', 'last_name')
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    # pg_trgm is Postgres-only; other backends keep plain LIKE scans.
+    if op.get_bind().dialect.name != 'postgresql':
+        return
+    op.execute('CREATE EXTENSION IF NOT EXISTS pg_trgm')
+    # CONCURRENTLY keeps users writable while the GIN indexes build; it can't
+    # run inside the migration transaction.
+    with op.get_context().autocommit_block():
+        for column in SEARCH_COLUMNS:
+            op.create_index(
+                f'ix_users_{column}_trgm', 'users', [column], unique=False,
+                postgresql_using='gin', postgresql_ops={column: 'gin_trgm_ops'},
+                postgresql_concurrently=True,
+            )
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    if op.get_bind().dialect.name != 'postgresql':
+        return
+    with op.get_context().autocommit_block():
+        for column in reversed(SEARCH_COLUMNS):
+            op.drop_index(f'ix_users_{column}_trgm', table_name='users', postgresql_concurrently=True)
@@ -0,0 +1,46 @@
+"""create user counters table
+
+Revision ID: a81d46f0c5e2
+Revises: 3c9e5b1d2a40
+Create Date: 2026-10-19 14:02:47.190265
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'a81d46f0c5e2'
+down_revision: Union[str, Sequence[str], None] = '3c9e5b1d2a40'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.create_table('user_counters',
+    sa.Column('name', sa.String(), nullable=False),
+    sa.Column('value', sa.BigInteger(), server_default='0', nullable=False),
+    sa.PrimaryKeyConstraint('name')
+    )
+    # Seed from the current table once; afterwards counters are maintained
+    # incrementally and reconciled by the periodic Celery task.
+    op.execute("""
+        INSERT INTO user_counters (name, value)
+        SELECT 'total', count(*) FROM users WHERE is_deleted IS NOT TRUE
+        UNION ALL
+        SELECT 'verified', count(*) FROM users WHERE is_deleted IS NOT TRUE AND is_verified IS TRUE
+        UNION ALL
+        SELECT 'unverified', count(*) FROM users WHERE is_deleted IS NOT TRUE AND is_verified IS NOT TRUE
+        UNION ALL
+        SELECT 'admins', count(*) FROM users WHERE is_deleted IS NOT TRUE AND role = 'admin'
+        UNION ALL
+        SELECT 'deleted', count(*) FROM users WHERE is_deleted IS TRUE
+    """)
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_table('user_counters')
@@ -0,0 +1,130 @@
+"""active users partial indexes and archive
+
+Revision ID: d4f07c3e91b8
+Revises: a81d46f0c5e2
+Create Date: 2026-10-19 17:40:11.862047
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'd4f07c3e91b8'
+down_revision: Union[str, Sequence[str], None] = 'a81d46f0c5e2'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+SEARCH_COLUMNS = ('email', 'first_name', 'last_name')
+ACTIVE_USERS = sa.text('NOT is_deleted')
+DELETED_USERS = sa.text('is_deleted')
+BACKFILL_BATCH_SIZE = 10000
+
+# Everything touching users runs in autocommit blocks: indexes are built and
+# dropped CONCURRENTLY and the backfill commits per batch, so no long-held
+# lock blocks reads/writes on a large table.
+
+
+def _backfill_is_deleted() -> None:
+    # Rows created before is_deleted existed hold NULL; walk the PK in ranges
+    bind = op.get_bind()
+    min_id, max_id = bind.execute(sa.text('SELECT min(id), max(id) FROM users')).one()
+    if min_id is None:
+        return
+    for start in range(min_id, max_id + 1, BACKFILL_BATCH_SIZE):
+        bind.execute(
+            sa.text(
+                'UPDATE users SET is_deleted = false '
+                'WHERE id >= :start AND id < :end AND is_deleted IS NULL'
+            ),
+            {'start': start, 'end': start + BACKFILL_BATCH_SIZE},
+        )
+
+
+def _create_trgm_indexes(suffix: str, where=None) -> None:
+    for column in SEARCH_COLUMNS:
+        op.create_index(
+            f'ix_users_{column}_trgm{suffix}', 'users', [column], unique=False,
+            postgresql_using='gin', postgresql_ops={column: 'gin_trgm_ops'},
+            postgresql_where=where, postgresql_concurrently=True,
+        )
+
+
+def _drop_trgm_indexes(suffix: str) -> None:
+    for column in reversed(SEARCH_COLUMNS):
+        op.drop_index(f'ix_users_{column}_trgm{suffix}', table_name='users', postgresql_concurrently=True)
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    postgres = op.get_bind().dialect.name == 'postgresql'
+
+    op.create_table('users_archive',
+    sa.Column('id', sa.Integer(), autoincrement=False, nullable=False),
+    sa.Column('email', sa.String(), nullable=False),
+    sa.Column('hashed_password', sa.String(), nullable=False),
+    sa.Column('first_name', sa.String(), nullable=True),
+    sa.Column('last_name', sa.String(), nullable=True),
+    sa.Column('is_verified', sa.Boolean(), nullable=True),
+    sa.Column('role', sa.String(), nullable=True),
+    sa.Column('verification_code', sa.String(), nullable=True),
+    sa.Column('created_at', sa.DateTime(timezone=True), nullable=True),
+    sa.Column('updated_at', sa.DateTime(timezone=True), nullable=True),
+    sa.Column('deleted_at', sa.DateTime(timezone=True), nullable=True),
+    sa.Column('archived_at', sa.DateTime(timezone=True), server_default=sa.text('now()'), nullable=True),
+    sa.PrimaryKeyConstraint('id')
+    )
+    op.create_index(op.f('ix_users_archive_email'), 'users_archive', ['email'], unique=False)
+    # Catalog-only change, new rows stop arriving as NULL from here on
+    op.alter_column('users', 'is_deleted', existing_type=sa.Boolean(), server_default=sa.false())
+
+    with op.get_context().autocommit_block():
+        _backfill_is_deleted()
+        if postgres:
+            # VALIDATE scans without blocking writes; SET NOT NULL then trusts
+            # the valid constraint instead of rescanning under an exclusive lock
+            op.execute('ALTER TABLE users ADD CONSTRAINT ck_users_is_deleted_not_null CHECK (is_deleted IS NOT NULL) NOT VALID')
+            op.execute('ALTER TABLE users VALIDATE CONSTRAINT ck_users_is_deleted_not_null')
+            op.alter_column('users', 'is_deleted', existing_type=sa.Boolean(), nullable=False)
+            op.drop_constraint('ck_users_is_deleted_not_null', 'users', type_='check')
+        else:
+            op.alter_column('users', 'is_deleted', existing_type=sa.Boolean(), nullable=False)
+
+        # New partial indexes are built before the full ones are dropped
+        op.create_index(
+            'ix_users_email_active', 'users', ['email'], unique=True,
+            postgresql_where=ACTIVE_USERS, postgresql_concurrently=True,
+        )
+        if postgres:
+            _create_trgm_indexes('_active', where=ACTIVE_USERS)
+        # Lets the archive job find long-deleted rows without scanning users
+        op.create_index(
+            'ix_users_deleted_at_deleted', 'users', ['deleted_at'], unique=False,
+            postgresql_where=DELETED_USERS, postgresql_concurrently=True,
+        )
+
+        op.drop_index(op.f('ix_users_email'), table_name='users', postgresql_concurrently=True)
+        if postgres:
+            _drop_trgm_indexes('')
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    postgres = op.get_bind().dialect.name == 'postgresql'
+
+    with op.get_context().autocommit_block():
+        # Fails if a deleted address has since been re-registered
+        op.create_index(op.f('ix_users_email'), 'users', ['email'], unique=True, postgresql_concurrently=True)
+        if postgres:
+            _create_trgm_indexes('')
+
+        op.drop_index('ix_users_deleted_at_deleted', table_name='users', postgresql_concurrently=True)
+        op.drop_index('ix_users_email_active', table_name='users', postgresql_concurrently=True)
+        if postgres:
+            _drop_trgm_indexes('_active')
+
+    op.alter_column('users', 'is_deleted', existing_type=sa.Boolean(), nullable=True, server_default=None)
+    op.drop_index(op.f('ix_users_archive_email'), table_name='users_archive')
+    op.drop_table('users_archive')
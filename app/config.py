@@ -1,6 +1,8 @@
+import os
 from pathlib import Path
 from dotenv import load_dotenv
-from pydantic import EmailStr, field_validator, ConfigDict
+from typing import Optional
+from pydantic import EmailStr, field_validator, model_validator, ConfigDict
 from pydantic_settings import BaseSettings, SettingsConfigDict
 from zoneinfo import ZoneInfo
 
@@ -16,6 +18,13 @@ class Settings(BaseSettings):
     )
     PROJECT_NAME: str = "Coffee Shop"
     DATABASE_URL: str
+    DB_ECHO: bool = True
+    # Connections the app may hold in total across all web workers. Keep it
+    # below Postgres max_connections minus Celery, migrations and admin slack.
+    DB_MAX_CONNECTIONS: int = 80
+    DB_MAX_OVERFLOW: int = 2
+    # Replace pooled connections before server/firewall idle timeouts drop them
+    DB_POOL_RECYCLE_SECONDS: int = 1800
     JWT_SECRET_KEY: str = "secret"
     JWT_ALGORITHM: str = "HS256"
     ACCESS_TOKEN_EXPIRE_MINUTES: int = 30
@@ -26,13 +35,22 @@ class Settings(BaseSettings):
     SMTP_PASSWORD: str
     SMTP_FROM: EmailStr
 
+    # Defaults to the CPU count, capped by what DB_MAX_CONNECTIONS can serve
+    WEB_CONCURRENCY: Optional[int] = None
+    WEB_GRACEFUL_TIMEOUT: int = 30
+
     UNVERIFIED_USER_LIFETIME_MINUTES: int = 2880
+    DELETED_USER_ARCHIVE_AFTER_DAYS: int = 30
+    DELETED_USER_ARCHIVE_BATCH_SIZE: int = 1000
     TIMEZONE: str = "Asia/Tashkent"
 
     CELERY_BROKER_URL: str = "redis://localhost:6379/0"
     CELERY_RESULT_BACKEND: str = "redis://localhost:6379/0"
     CELERY_UNVERIFIED_USER_CLEANUP_HOUR: int = 0
     CELERY_UNVERIFIED_USER_CLEANUP_MINUTE: int = 0
+    CELERY_USER_STATS_RECONCILE_MINUTE: int = 30
+    CELERY_DELETED_USER_ARCHIVE_HOUR: int = 1
+    CELERY_DELETED_USER_ARCHIVE_MINUTE: int = 0
 
     @field_validator("TIMEZONE", mode="before")
     def validate_timezone(cls, v):
@@ -43,8 +61,27 @@ class Settings(BaseSettings):
         except Exception:
             raise ValueError(f"Invalid timezone: {v}")
 
+    @model_validator(mode="after")
+    def validate_db_connection_budget(self):
+        per_worker_min = 1 + self.DB_MAX_OVERFLOW
+        if self.WEB_CONCURRENCY is None:
+            self.WEB_CONCURRENCY = min(os.cpu_count() or 1, self.DB_MAX_CONNECTIONS // per_worker_min)
+        if self.WEB_CONCURRENCY < 1 or self.WEB_CONCURRENCY * per_worker_min > self.DB_MAX_CONNECTIONS:
+            raise ValueError(
+                f"WEB_CONCURRENCY={self.WEB_CONCURRENCY} workers need at least "
+                f"{self.WEB_CONCURRENCY} * (1 + DB_MAX_OVERFLOW={self.DB_MAX_OVERFLOW}) connections, "
+                f"over DB_MAX_CONNECTIONS={self.DB_MAX_CONNECTIONS}"
+            )
+        return self
+
     @property
     def tzinfo(self) -> ZoneInfo:
         return ZoneInfo(self.TIMEZONE)
 
+    @property
+    def db_pool_size(self) -> int:
+        # Per-worker pool, so workers * (pool_size + max_overflow) <= DB_MAX_CONNECTIONS;
+        # validate_db_connection_budget guarantees this is at least 1
+        return self.DB_MAX_CONNECTIONS // self.WEB_CONCURRENCY - self.DB_MAX_OVERFLOW
+
 settings = Settings()
@@ -1,7 +1,18 @@
+from contextlib import asynccontextmanager
 from fastapi import FastAPI
+from . import db
 from .routers import auth, users
 
-app = FastAPI(title="Coffee Shop API")
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    # Runs per worker before it starts accepting requests
+    await db.warm_pool()
+    yield
+    await db.engine.dispose()
+
+
+app = FastAPI(title="Coffee Shop API", lifespan=lifespan)
 
 app.include_router(auth.router)
 app.include_router(users.router)
@@ -1,7 +1,11 @@
 import enum
-from sqlalchemy import Column, Integer, String, Boolean, DateTime, func, Enum
+from sqlalchemy import Column, Integer, BigInteger, String, Boolean, DateTime, func, Enum, Index, DDL, event, false, text
+from sqlalchemy.orm import Session, with_loader_criteria
 from .db import Base
 
+ACTIVE_USERS = text("NOT is_deleted")
+DELETED_USERS = text("is_deleted")
+
 class RoleEnum(str, enum.Enum):
     user = "user"
     admin = "admin"
@@ -11,7 +15,7 @@ class User(Base):
     __tablename__ = "users"
 
     id = Column(Integer, primary_key=True, index=True)
-    email = Column(String, unique=True, index=True, nullable=False)
+    email = Column(String, nullable=False)
     hashed_password = Column(String, nullable=False)
     first_name = Column(String, nullable=True)
     last_name = Column(String, nullable=True)
@@ -19,6 +23,92 @@ class User(Base):
     role = Column(String, default="user")
     verification_code = Column(String, nullable=True)
     created_at = Column(DateTime(timezone=True), server_default=func.now())
-    is_deleted = Column(Boolean, default=False)
+    is_deleted = Column(Boolean, default=False, server_default=false(), nullable=False)
     updated_at = Column(DateTime(timezone=True), onupdate=func.now())
     deleted_at = Column(DateTime(timezone=True))
+
+    # Lookup indexes cover active users only, so a deleted address can sign up
+    # again and soft-deleted rows don't bloat them.
+    # Trigram GIN indexes back prefix/substring search on Postgres; other
+    # dialects (SQLite in tests) get plain indexes and fall back to LIKE scans.
+    __table_args__ = (
+        Index("ix_users_email_active", "email", unique=True, postgresql_where=ACTIVE_USERS, sqlite_where=ACTIVE_USERS),
+        # Small index over deleted rows only, drives the nightly archive batches
+        Index("ix_users_deleted_at_deleted", "deleted_at", postgresql_where=DELETED_USERS, sqlite_where=DELETED_USERS),
+        Index(
+            "ix_users_email_trgm_active", "email", postgresql_where=ACTIVE_USERS, sqlite_where=ACTIVE_USERS,
+            postgresql_using="gin", postgresql_ops={"email": "gin_trgm_ops"},
+        ),
+        Index(
+            "ix_users_first_name_trgm_active", "first_name", postgresql_where=ACTIVE_USERS, sqlite_where=ACTIVE_USERS,
+            postgresql_using="gin", postgresql_ops={"first_name": "gin_trgm_ops"},
+        ),
+        Index(
+            "ix_users_last_name_trgm_active", "last_name", postgresql_where=ACTIVE_USERS, sqlite_where=ACTIVE_USERS,
+            postgresql_using="gin", postgresql_ops={"last_name": "gin_trgm_ops"},
+        ),
+    )
+
+
+event.listen(
+    User.__table__,
+    "before_create",
+    DDL("CREATE EXTENSION IF NOT EXISTS pg_trgm").execute_if(dialect="postgresql"),
+)
+
+
+@event.listens_for(Session, "do_orm_execute")
+def _filter_deleted_users(execute_state):
+    """
+    Hide soft-deleted users from every ORM select (including session.get).
+    Opt out per statement with .execution_options(include_deleted=True).
+    """
+    if (
+        execute_state.is_select
+        and not execute_state.is_column_load
+        and not execute_state.is_relationship_load
+        and not execute_state.execution_options.get("include_deleted", False)
+    ):
+        execute_state.statement = execute_state.statement.options(
+            with_loader_criteria(User, lambda cls: cls.is_deleted == False, include_aliases=True)
+        )
+
+
+class UserArchive(Base):
+    """
+    Long-deleted users moved out of the hot users table.
+    """
+    __tablename__ = "users_archive"
+
+    id = Column(Integer, primary_key=True, autoincrement=False)
+    email = Column(String, index=True, nullable=False)
+    hashed_password = Column(String, nullable=False)
+    first_name = Column(String, nullable=True)
+    last_name = Column(String, nullable=True)
+    is_verified = Column(Boolean)
+    role = Column(String)
+    verification_code = Column(String, nullable=True)
+    created_at = Column(DateTime(timezone=True))
+    updated_at = Column(DateTime(timezone=True))
+    deleted_at = Column(DateTime(timezone=True))
+    archived_at = Column(DateTime(timezone=True), server_default=func.now())
+
+
+class UserCounter(Base):
+    """
+    Incrementally maintained user statistics, one row per counter name.
+    """
+    __tablename__ = "user_counters"
+
+    name = Column(String, primary_key=True)
+    value = Column(BigInteger, nullable=False, default=0, server_default="0")
+
+
+event.listen(
+    UserCounter.__table__,
+    "after_create",
+    DDL(
+        "INSERT INTO user_counters (name, value) VALUES "
+        "('total', 0), ('verified', 0), ('unverified', 0), ('admins', 0), ('deleted', 0)"
+    ),
+)
@@ -4,7 +4,7 @@ from app import schemas, views, db
 
 router = APIRouter(prefix="/auth", tags=["auth"])
 
-@router.post("/signup", response_model=schemas.UserRead)
+@router.post("/signup", response_model=schemas.UserRead, status_code=201)
 async def signup(user: schemas.UserCreate, conn: AsyncSession = Depends(db.get_db)):
     if await views.get_user_by_email(conn, user.email):
         raise HTTPException(status_code=400, detail="Email already registered")
@@ -1,8 +1,9 @@
-from typing import List
-from fastapi import APIRouter, Depends, HTTPException
+from collections import Counter
+from typing import List, Literal, Optional
+from fastapi import APIRouter, Depends, HTTPException, Query
 from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.future import select
-from app import views, schemas, models, permissions as deps, db
+from app import views, schemas, models, permissions as deps, db, user_stats
 
 router = APIRouter(prefix="/users", tags=["users"])
 
@@ -18,6 +19,24 @@ async def get_users(conn: AsyncSession = Depends(db.get_db)):
     return result.scalars().all()
 
 
+@router.get("/search", response_model=schemas.UserSearchPage, dependencies=[Depends(deps.is_admin)])
+async def search_users(
+    q: str = Query(..., min_length=views.SEARCH_MIN_LENGTH, max_length=255),
+    mode: Literal["prefix", "substring"] = "substring",
+    field: Optional[Literal["email", "first_name", "last_name"]] = None,
+    limit: int = Query(20, ge=1, le=100),
+    cursor: Optional[str] = None,
+    conn: AsyncSession = Depends(db.get_db),
+):
+    users, next_cursor = await views.search_users(conn, q, mode=mode, field=field, limit=limit, cursor=cursor)
+    return {"items": users, "next_cursor": next_cursor}
+
+
+@router.get("/stats", response_model=schemas.UserStats, dependencies=[Depends(deps.is_admin)])
+async def get_user_stats(conn: AsyncSession = Depends(db.get_db)):
+    return await user_stats.get_user_stats(conn)
+
+
 @router.get("/{user_id}", response_model=schemas.UserRead, dependencies=[Depends(deps.is_admin)])
 async def get_user(user_id: int, conn: AsyncSession = Depends(db.get_db)):
     user = await conn.get(models.User, user_id)
@@ -39,14 +58,14 @@ async def partial_update_user(user_id: int, data: schemas.UserUpdate, conn: Asyn
     return user
 
 
-@router.delete("/{user_id}", dependencies=[Depends(deps.is_admin)])
+@router.delete("/{user_id}", status_code=204, dependencies=[Depends(deps.is_admin)])
 async def delete_user(user_id: int, conn: AsyncSession = Depends(db.get_db)):
     user = await conn.get(models.User, user_id)
     if not user:
         raise HTTPException(status_code=404, detail="User not found")
+    await user_stats.bump_user_stats(conn, user_stats.counters_delta(user_stats.user_counters(user), Counter()))
     await conn.delete(user)
     await conn.commit()
-    return {"detail": "User deleted"}
 
 
 @router.patch("/{user_id}/role", response_model=schemas.UserRead, dependencies=[Depends(deps.is_admin)])
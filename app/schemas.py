@@ -1,11 +1,11 @@
 from pydantic import BaseModel, EmailStr
-from typing import Optional
+from typing import List, Optional
 
 class UserCreate(BaseModel):
     email: EmailStr
     password: str
-    first_name: Optional[str]
-    last_name: Optional[str]
+    first_name: Optional[str] = None
+    last_name: Optional[str] = None
 
 
 class UserRead(BaseModel):
@@ -21,9 +21,22 @@ class UserRead(BaseModel):
     }
 
 
+class UserSearchPage(BaseModel):
+    items: List[UserRead]
+    next_cursor: Optional[str] = None
+
+
+class UserStats(BaseModel):
+    total: int
+    verified: int
+    unverified: int
+    admins: int
+    deleted: int
+
+
 class UserUpdate(BaseModel):
-    first_name: Optional[str]
-    last_name: Optional[str]
+    first_name: Optional[str] = None
+    last_name: Optional[str] = None
 
 
 class UserUpdateRole(BaseModel):
@@ -26,5 +26,18 @@ celery.conf.beat_schedule = {
             hour=settings.CELERY_UNVERIFIED_USER_CLEANUP_HOUR,
             minute=settings.CELERY_UNVERIFIED_USER_CLEANUP_MINUTE
         ),
-    }
+    },
+    # Runs every night, moves long-deleted users to users_archive
+    "archive-deleted-users-every-night": {
+        "task": "app.tasks.user_tasks.archive_deleted_users",
+        "schedule": crontab(
+            hour=settings.CELERY_DELETED_USER_ARCHIVE_HOUR,
+            minute=settings.CELERY_DELETED_USER_ARCHIVE_MINUTE
+        ),
+    },
+    # Runs every hour, corrects drift in the incremental user counters
+    "reconcile-user-stats-every-hour": {
+        "task": "app.tasks.user_tasks.reconcile_user_stats",
+        "schedule": crontab(minute=settings.CELERY_USER_STATS_RECONCILE_MINUTE),
+    },
 }
@@ -1,10 +1,12 @@
 import asyncio
+from collections import Counter
 from datetime import datetime, timedelta
+from sqlalchemy import delete, insert
 from sqlalchemy.future import select
 from email.message import EmailMessage
 from app.config import settings
 from app.tasks.celery_app import celery
-from app import models
+from app import models, user_stats
 from app.db import AsyncSessionLocal
 from app.utils.send_email import async_send_mail
 
@@ -27,13 +29,71 @@ async def async_delete_unverified_users():
             )
         )
         users = result.scalars().all()
+        delta = Counter()
         for user in users:
+            delta.subtract(user_stats.user_counters(user))
             user.is_deleted = True
             user.deleted_at = datetime.now(settings.tzinfo)
+            delta.update(user_stats.user_counters(user))
+        await user_stats.bump_user_stats(db, delta)
         await db.commit()
         print(f"Deleted {len(users)} unverified users")
 
 
+@celery.task
+def archive_deleted_users():
+    asyncio.run(async_archive_deleted_users())
+
+
+ARCHIVED_COLUMNS = (
+    "id", "email", "hashed_password", "first_name", "last_name", "is_verified",
+    "role", "verification_code", "created_at", "updated_at", "deleted_at",
+)
+
+
+async def async_archive_deleted_users():
+    async with AsyncSessionLocal() as db:
+        ARCHIVE_THRESHOLD = datetime.now(settings.tzinfo) - timedelta(days=settings.DELETED_USER_ARCHIVE_AFTER_DAYS)
+
+        archived = 0
+        while True:
+            # Small batches keep each transaction and its row locks short
+            result = await db.execute(
+                select(models.User.id)
+                .filter(
+                    models.User.is_deleted == True,
+                    models.User.deleted_at < ARCHIVE_THRESHOLD,
+                )
+                .limit(settings.DELETED_USER_ARCHIVE_BATCH_SIZE)
+                .execution_options(include_deleted=True)
+            )
+            ids = result.scalars().all()
+            if not ids:
+                break
+            await db.execute(
+                insert(models.UserArchive).from_select(
+                    ARCHIVED_COLUMNS,
+                    select(*(getattr(models.User, column) for column in ARCHIVED_COLUMNS)).where(models.User.id.in_(ids)),
+                )
+            )
+            result = await db.execute(delete(models.User).where(models.User.id.in_(ids)))
+            await user_stats.bump_user_stats(db, Counter(deleted=-result.rowcount))
+            await db.commit()
+            archived += result.rowcount
+        print(f"Archived {archived} deleted users")
+
+
+@celery.task
+def reconcile_user_stats():
+    asyncio.run(async_reconcile_user_stats())
+
+
+async def async_reconcile_user_stats():
+    async with AsyncSessionLocal() as db:
+        stats = await user_stats.reconcile_user_stats(db)
+        print(f"Reconciled user stats: {stats}")
+
+
 @celery.task
 def send_verification_email(email: str, verification_code: str):
     verification_link = f"http://localhost:8000/verify?email={email}&code={verification_code}"
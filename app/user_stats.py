@@ -0,0 +1,86 @@
+from collections import Counter
+from sqlalchemy import func, update
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.future import select
+from . import models
+
+COUNTERS = ("total", "verified", "unverified", "admins", "deleted")
+
+
+def user_counters(user: models.User) -> Counter:
+    """
+    Counters a single user row contributes to.
+    """
+    if user.is_deleted:
+        return Counter(deleted=1)
+    counters = Counter(total=1)
+    counters["verified" if user.is_verified else "unverified"] += 1
+    if user.role == "admin":
+        counters["admins"] += 1
+    return counters
+
+
+def counters_delta(before: Counter, after: Counter) -> Counter:
+    delta = Counter(after)
+    delta.subtract(before)
+    return delta
+
+
+async def bump_user_stats(session: AsyncSession, delta: Counter):
+    """
+    Apply a delta in the caller's transaction, so counters commit (or roll
+    back) together with the user change that caused them.
+    """
+    for name, value in delta.items():
+        if value:
+            await session.execute(
+                update(models.UserCounter)
+                .where(models.UserCounter.name == name)
+                .values(value=models.UserCounter.value + value)
+            )
+
+
+async def get_user_stats(session: AsyncSession) -> dict:
+    result = await session.execute(select(models.UserCounter))
+    stats = dict.fromkeys(COUNTERS, 0)
+    stats.update({counter.name: counter.value for counter in result.scalars()})
+    return stats
+
+
+async def count_user_stats(session: AsyncSession) -> dict:
+    active = models.User.is_deleted.isnot(True)
+    verified = models.User.is_verified.is_(True)
+    result = await session.execute(
+        select(
+            func.count().filter(active),
+            func.count().filter(active, verified),
+            func.count().filter(active, verified.isnot(True)),
+            func.count().filter(active, models.User.role == "admin"),
+            func.count().filter(models.User.is_deleted.is_(True)),
+        ).execution_options(include_deleted=True)
+    )
+    return dict(zip(COUNTERS, result.one()))
+
+
+async def reconcile_user_stats(session: AsyncSession) -> dict:
+    """
+    Correct counter drift without blocking writers. Counters and real counts
+    are read from one snapshot, then only the difference is applied, so
+    increments committed after the snapshot are kept.
+    """
+    if session.get_bind().dialect.name == "postgresql":
+        await session.connection(execution_options={"isolation_level": "REPEATABLE READ"})
+    result = await session.execute(select(models.UserCounter))
+    snapshot = {counter.name: counter.value for counter in result.scalars()}
+    stats = await count_user_stats(session)
+    await session.commit()
+
+    delta = Counter()
+    for name, value in stats.items():
+        if name in snapshot:
+            delta[name] = value - snapshot[name]
+        else:
+            session.add(models.UserCounter(name=name, value=value))
+    await bump_user_stats(session, delta)
+    await session.commit()
+    return stats
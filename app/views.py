@@ -2,11 +2,13 @@ import uuid
 import bcrypt
 from fastapi import HTTPException
 from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy import and_, case, func, or_
 from sqlalchemy.future import select
 from datetime import datetime, timedelta
 from jose import jwt, JWTError
 from .config import settings
 from . import models, schemas
+from .user_stats import bump_user_stats, counters_delta, user_counters
 from app.tasks.user_tasks import send_verification_email
 
 
@@ -72,6 +74,7 @@ async def create_user(session: AsyncSession, user: schemas.UserCreate):
         verification_code=verification_code
     )
     session.add(session_user)
+    await bump_user_stats(session, user_counters(session_user))
     await session.commit()
     await session.refresh(session_user)
     send_verification_email.delay(session_user.email, verification_code)
@@ -82,8 +85,10 @@ async def create_user(session: AsyncSession, user: schemas.UserCreate):
 async def verify_user(session: AsyncSession, email: str, code: str):
     user = await get_user_by_email(session, email)
     if user and user.verification_code == code:
+        before = user_counters(user)
         user.is_verified = True
         user.verification_code = None
+        await bump_user_stats(session, counters_delta(before, user_counters(user)))
         await session.commit()
         await session.refresh(user)
         return user
@@ -101,7 +106,68 @@ async def set_user_role(session: AsyncSession, data: schemas.UserUpdateRole) ->
     if role not in ("admin", "user"):
         raise HTTPException(status_code=403, detail="Invalid role")
 
+    before = user_counters(user)
     user.role = role
+    await bump_user_stats(session, counters_delta(before, user_counters(user)))
     await session.commit()
     await session.refresh(user)
-    return user
\ No newline at end of file
+    return user
+
+
+SEARCH_FIELDS = ("email", "first_name", "last_name")
+# pg_trgm can't use its GIN index for patterns shorter than one trigram
+SEARCH_MIN_LENGTH = 3
+
+
+def encode_search_cursor(rank: int, user_id: int) -> str:
+    return f"{rank}:{user_id}"
+
+
+def decode_search_cursor(cursor: str) -> tuple[int, int]:
+    try:
+        rank, user_id = cursor.split(":")
+        return int(rank), int(user_id)
+    except ValueError:
+        raise HTTPException(status_code=400, detail="Invalid cursor")
+
+
+async def search_users(
+    session: AsyncSession,
+    query: str,
+    mode: str = "substring",
+    field: str | None = None,
+    limit: int = 20,
+    cursor: str | None = None,
+) -> tuple[list[models.User], str | None]:
+    """
+    Prefix/substring search over email and names, ranked exact email match
+    first, then prefix matches, then substring matches. Paginated by keyset
+    on (rank, id), which avoids OFFSET but still ranks and sorts the whole
+    match set on every page; the trigram index keeps that set cheap to find
+    for queries of at least SEARCH_MIN_LENGTH characters.
+    """
+    columns = [getattr(models.User, name) for name in ((field,) if field else SEARCH_FIELDS)]
+    prefix_match = or_(*(column.istartswith(query, autoescape=True) for column in columns))
+    if mode == "prefix":
+        match = prefix_match
+    else:
+        match = or_(*(column.icontains(query, autoescape=True) for column in columns))
+
+    rank = case(
+        (func.lower(models.User.email) == query.lower(), 0),
+        (prefix_match, 1),
+        else_=2,
+    )
+    stmt = select(models.User, rank).filter(match)
+    if cursor:
+        last_rank, last_id = decode_search_cursor(cursor)
+        stmt = stmt.filter(or_(rank > last_rank, and_(rank == last_rank, models.User.id > last_id)))
+    stmt = stmt.order_by(rank, models.User.id).limit(limit + 1)
+
+    rows = (await session.execute(stmt)).all()
+    next_cursor = None
+    if len(rows) > limit:
+        rows = rows[:limit]
+        last_user, last_rank = rows[-1]
+        next_cursor = encode_search_cursor(last_rank, last_user.id)
+    return [user for user, _ in rows], next_cursor
@@ -9,6 +9,7 @@
 # barista celery:worker [force]          -> start Celery worker (optionally force kill existing)
 # barista celery:beat [force]            -> start Celery beat (optionally force kill existing)
 # barista uvicorn [port]                 -> start Uvicorn app (default port 8000)
+# barista app:serve [port]               -> start production server, gunicorn + uvicorn workers
 # barista shop:up                        -> docker-compose up
 # barista shop:down                      -> docker-compose down
 # barista shop:build                      -> docker-compose build
@@ -92,6 +93,14 @@ start_server() {
     echo -e "${GREEN}Uvicorn started.${NC}"
 }
 
+# ----------- PRODUCTION SERVER FUNCTION -----------
+start_prod_server() {
+    export PORT=${MESSAGE:-8000}
+    echo -e "${GREEN}Starting Gunicorn on port $PORT...${NC}"
+    # exec so SIGTERM reaches gunicorn directly and workers drain gracefully
+    exec gunicorn -c gunicorn.conf.py app.main:app
+}
+
 # ----------- DOCKER COMPOSE FUNCTIONS -----------
 docker_up() {
     echo -e "${GREEN}Bringing up Docker containers...${NC}"
@@ -148,6 +157,9 @@ case $ACTION in
     app:runserver)
         start_server
         ;;
+    app:serve)
+        start_prod_server
+        ;;
     compose:up)
         docker_up
         ;;
@@ -174,6 +186,7 @@ case $ACTION in
         echo -e "  barista celery:beat:stop                     -> Stop Celery beat"
         echo -e "  barista celery:beat:restart                  -> Restart Celery beat"
         echo -e "  barista runserver [port]                     -> Start Uvicorn server (default 8000)"
+        echo -e "  barista app:serve [port]                     -> Start production Gunicorn server (default 8000)"
         echo -e "  barista compose:up                              -> Start docker containers"
         echo -e "  barista compose:down                            -> Stop docker containers"
         echo -e "  barista compose:build                           -> Build docker containers"
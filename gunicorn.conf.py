@@ -0,0 +1,19 @@
+# gunicorn.conf.py - production serving: gunicorn master + uvicorn workers
+import os
+
+# SQL echo is a dev convenience; must be set before app.config is loaded
+os.environ.setdefault("DB_ECHO", "false")
+
+from app.config import settings
+
+bind = f"0.0.0.0:{os.getenv('PORT', '8000')}"
+workers = settings.WEB_CONCURRENCY
+# Picks uvloop + httptools when installed (uvicorn[standard])
+worker_class = "uvicorn_worker.UvicornWorker"
+# Import the app once in the master, workers fork with it already loaded
+preload_app = True
+# On SIGTERM workers stop accepting and drain in-flight requests for this long
+graceful_timeout = settings.WEB_GRACEFUL_TIMEOUT
+timeout = 60
+keepalive = 5
+accesslog = "-"
@@ -0,0 +1,115 @@
+import os
+from contextlib import contextmanager
+
+# Settings are read at import time, so the environment must be in place first
+os.environ.setdefault("DATABASE_URL", "sqlite+aiosqlite:///./test_app.db")
+os.environ.setdefault("DB_ECHO", "false")
+os.environ.setdefault("SMTP_HOST", "localhost")
+os.environ.setdefault("SMTP_PORT", "1025")
+os.environ.setdefault("SMTP_USER", "test@example.com")
+os.environ.setdefault("SMTP_PASSWORD", "test")
+os.environ.setdefault("SMTP_FROM", "test@example.com")
+
+import pytest
+import pytest_asyncio
+from httpx import AsyncClient, ASGITransport
+from sqlalchemy import create_engine, event
+from sqlalchemy.ext.asyncio import AsyncSession, create_async_engine
+from sqlalchemy.pool import NullPool
+
+from app import views
+from app.db import Base, get_db
+from app.main import app
+
+# Transaction control statements emitted by the fixtures themselves
+_CONTROL_STATEMENTS = ("BEGIN", "COMMIT", "ROLLBACK", "SAVEPOINT", "RELEASE")
+
+
+class QueryCounter:
+    """
+    Records SQL statements executed by the app, for query-budget assertions.
+    """
+    def __init__(self):
+        self.statements = []
+
+    def __call__(self, conn, cursor, statement, parameters, context, executemany):
+        if not statement.lstrip().upper().startswith(_CONTROL_STATEMENTS):
+            self.statements.append(statement)
+
+    @property
+    def count(self) -> int:
+        return len(self.statements)
+
+    @contextmanager
+    def budget(self, limit: int):
+        start = self.count
+        yield
+        executed = self.statements[start:]
+        assert len(executed) <= limit, f"Expected at most {limit} queries, got {len(executed)}:\n" + "\n".join(executed)
+
+
+@pytest.fixture(scope="session")
+def database_url(tmp_path_factory):
+    """
+    One throwaway SQLite database per pytest-xdist worker, schema created once.
+    """
+    worker = os.getenv("PYTEST_XDIST_WORKER", "main")
+    path = tmp_path_factory.mktemp("db") / f"test_{worker}.db"
+    sync_engine = create_engine(f"sqlite:///{path}")
+    Base.metadata.create_all(sync_engine)
+    sync_engine.dispose()
+    return f"sqlite+aiosqlite:///{path}"
+
+
+@pytest.fixture
+def query_counter():
+    return QueryCounter()
+
+
+@pytest_asyncio.fixture
+async def engine(database_url, query_counter):
+    engine = create_async_engine(database_url, poolclass=NullPool)
+
+    # pysqlite's own transaction handling breaks SAVEPOINT; emit BEGIN ourselves
+    @event.listens_for(engine.sync_engine, "connect")
+    def do_connect(dbapi_connection, connection_record):
+        dbapi_connection.isolation_level = None
+
+    @event.listens_for(engine.sync_engine, "begin")
+    def do_begin(conn):
+        conn.exec_driver_sql("BEGIN")
+
+    event.listen(engine.sync_engine, "before_cursor_execute", query_counter)
+    yield engine
+    await engine.dispose()
+
+
+@pytest_asyncio.fixture
+async def db_session(engine):
+    """
+    Session inside an outer transaction that is rolled back after the test.
+    App commits only release a SAVEPOINT, so tests never see each other's rows.
+    """
+    async with engine.connect() as conn:
+        trans = await conn.begin()
+        session = AsyncSession(bind=conn, expire_on_commit=False, join_transaction_mode="create_savepoint")
+        yield session
+        await session.close()
+        await trans.rollback()
+
+
+@pytest.fixture(autouse=True)
+def no_verification_email(monkeypatch):
+    monkeypatch.setattr(views.send_verification_email, "delay", lambda *args, **kwargs: None)
+
+
+@pytest_asyncio.fixture
+async def client(db_session):
+    async def override_get_db():
+        yield db_session
+
+    app.dependency_overrides[get_db] = override_get_db
+    transport = ASGITransport(app=app)
+    async with AsyncClient(transport=transport, base_url="http://test") as c:
+        yield c
+    app.dependency_overrides.pop(get_db, None)
@@ -1,59 +1,51 @@
-# tests/test_api_async_pg.py
+# tests/test.py
+from datetime import datetime, timedelta
 import pytest
 import pytest_asyncio
-from httpx import AsyncClient, ASGITransport
-from sqlalchemy.ext.asyncio import create_async_engine, AsyncSession
-from sqlalchemy.orm import sessionmaker
+from httpx import AsyncClient
+from sqlalchemy import update
+from sqlalchemy.future import select
 
-from app.main import app
-from app.db import get_db, Base
-from app import models
-from app.views import create_access_token
+from app import models, user_stats, views
+from app.config import settings
+from app.tasks import user_tasks
+from app.views import create_access_token, create_refresh_token, get_password_hash
 
 
-TEST_DATABASE_URL = "YOUR_TEST_DB_URL"
-engine = create_async_engine(TEST_DATABASE_URL, echo=False)
-AsyncSessionLocal = sessionmaker(engine, class_=AsyncSession, expire_on_commit=False)
-
-async def override_get_db():
-    async with AsyncSessionLocal() as session:
-        yield session
-
-app.dependency_overrides[get_db] = override_get_db
-
-
-@pytest_asyncio.fixture(scope="function")
-async def setup_db():
-    async with engine.begin() as conn:
-        await conn.run_sync(Base.metadata.drop_all)
-        await conn.run_sync(Base.metadata.create_all)
-    yield
-    async with engine.begin() as conn:
-        await conn.run_sync(Base.metadata.drop_all)
+@pytest_asyncio.fixture
+async def test_user(db_session):
+    user = models.User(
+        email="test@example.com",
+        hashed_password=get_password_hash("password").decode("utf-8"),
+        role="user",
+        is_verified=True
+    )
+    db_session.add(user)
+    await db_session.commit()
+    await db_session.refresh(user)
+    return user
 
 @pytest_asyncio.fixture
-async def client(setup_db):
-    transport = ASGITransport(app=app)
-    async with AsyncClient(transport=transport, base_url="http://test") as c:
-        yield c
+async def auth_headers(test_user):
+    token = create_access_token({"sub": test_user.email})
+    return {"Authorization": f"Bearer {token}"}
 
 @pytest_asyncio.fixture
-async def test_user():
-    async with AsyncSessionLocal() as session:
-        user = models.User(
-            email="test@example.com",
-            password="hashedpassword",
-            role="user",
-            is_verified=True
-        )
-        session.add(user)
-        await session.commit()
-        await session.refresh(user)
-        return user
+async def admin_user(db_session):
+    user = models.User(
+        email="admin@example.com",
+        hashed_password="hashedpassword",
+        role="admin",
+        is_verified=True
+    )
+    db_session.add(user)
+    await db_session.commit()
+    await db_session.refresh(user)
+    return user
 
 @pytest_asyncio.fixture
-async def auth_headers(test_user):
-    token = create_access_token({"sub": str(test_user.id)})
+async def admin_headers(admin_user):
+    token = create_access_token({"sub": admin_user.email})
     return {"Authorization": f"Bearer {token}"}
 
 # -----------------------------
@@ -77,8 +69,9 @@ async def test_verify_user(client: AsyncClient):
     assert response.status_code in (200, 400)
 
 @pytest.mark.asyncio
-async def test_refresh_token(client: AsyncClient, auth_headers):
-    response = await client.post("/auth/refresh", headers=auth_headers)
+async def test_refresh_token(client: AsyncClient, test_user):
+    refresh_token = create_refresh_token({"sub": test_user.email})
+    response = await client.post("/auth/refresh", json={"refresh_token": refresh_token})
     assert response.status_code == 200
     assert "access_token" in response.json()
 
@@ -89,14 +82,14 @@ async def test_get_me(client: AsyncClient, auth_headers):
     assert "email" in response.json()
 
 @pytest.mark.asyncio
-async def test_get_users(client: AsyncClient, auth_headers):
-    response = await client.get("/users/", headers=auth_headers)
+async def test_get_users(client: AsyncClient, admin_headers):
+    response = await client.get("/users/", headers=admin_headers)
     assert response.status_code == 200
     assert isinstance(response.json(), list)
 
 @pytest.mark.asyncio
-async def test_get_user(client: AsyncClient, auth_headers, test_user):
-    response = await client.get(f"/users/{test_user.id}", headers=auth_headers)
+async def test_get_user(client: AsyncClient, admin_headers, test_user):
+    response = await client.get(f"/users/{test_user.id}", headers=admin_headers)
     assert response.status_code == 200
     assert response.json()["id"] == test_user.id
 
@@ -107,12 +100,190 @@ async def test_patch_user(client: AsyncClient, auth_headers, test_user):
     assert response.json()["first_name"] == "John"
 
 @pytest.mark.asyncio
-async def test_delete_user(client: AsyncClient, auth_headers, test_user):
-    response = await client.delete(f"/users/{test_user.id}", headers=auth_headers)
+async def test_delete_user(client: AsyncClient, admin_headers, test_user):
+    response = await client.delete(f"/users/{test_user.id}", headers=admin_headers)
     assert response.status_code == 204
 
 @pytest.mark.asyncio
-async def test_set_user_role(client: AsyncClient, auth_headers, test_user):
-    response = await client.patch(f"/users/{test_user.id}/role", headers=auth_headers, json={"role": "admin"})
+async def test_set_user_role(client: AsyncClient, admin_headers, test_user):
+    response = await client.patch(
+        f"/users/{test_user.id}/role", headers=admin_headers, json={"role": "admin", "user_id": test_user.id}
+    )
     assert response.status_code == 200
     assert response.json()["role"] == "admin"
+
+@pytest.mark.asyncio
+async def test_search_users(client: AsyncClient, admin_headers, test_user):
+    response = await client.get("/users/search", headers=admin_headers, params={"q": "test", "mode": "prefix"})
+    assert response.status_code == 200
+    assert [u["email"] for u in response.json()["items"]] == [test_user.email]
+
+@pytest.mark.asyncio
+async def test_search_users_ranking(client: AsyncClient, db_session, admin_headers):
+    # Inserted in reverse rank order, so id order alone can't produce the expected order
+    for email in ("jsmith@example.com", "smith@example.com.au", "smith@example.com"):
+        db_session.add(models.User(email=email, hashed_password="hashedpassword"))
+    await db_session.commit()
+
+    emails, cursor = [], None
+    for _ in range(3):
+        params = {"q": "smith@example.com", "limit": 1, **({"cursor": cursor} if cursor else {})}
+        page = (await client.get("/users/search", headers=admin_headers, params=params)).json()
+        emails += [u["email"] for u in page["items"]]
+        cursor = page["next_cursor"]
+    assert emails == ["smith@example.com", "smith@example.com.au", "jsmith@example.com"]
+    assert cursor is None
+
+@pytest.mark.asyncio
+async def test_search_users_by_field(client: AsyncClient, db_session, admin_headers):
+    db_session.add(models.User(email="anna@example.com", hashed_password="hashedpassword", first_name="Zed"))
+    db_session.add(models.User(email="zed@example.com", hashed_password="hashedpassword", first_name="Joanna"))
+    await db_session.commit()
+
+    response = await client.get("/users/search", headers=admin_headers, params={"q": "anna"})
+    assert {u["email"] for u in response.json()["items"]} == {"anna@example.com", "zed@example.com"}
+    response = await client.get("/users/search", headers=admin_headers, params={"q": "anna", "field": "first_name"})
+    assert [u["email"] for u in response.json()["items"]] == ["zed@example.com"]
+
+@pytest.mark.asyncio
+async def test_search_users_rejects_short_query(client: AsyncClient, admin_headers):
+    response = await client.get("/users/search", headers=admin_headers, params={"q": "te"})
+    assert response.status_code == 422
+
+@pytest.mark.asyncio
+async def test_search_users_pagination(client: AsyncClient, admin_headers, test_user):
+    response = await client.get("/users/search", headers=admin_headers, params={"q": "example", "limit": 1})
+    assert response.status_code == 200
+    first_page = response.json()
+    assert len(first_page["items"]) == 1
+    assert first_page["next_cursor"]
+
+    response = await client.get(
+        "/users/search", headers=admin_headers, params={"q": "example", "limit": 1, "cursor": first_page["next_cursor"]}
+    )
+    second_page = response.json()
+    assert len(second_page["items"]) == 1
+    assert second_page["items"][0]["id"] != first_page["items"][0]["id"]
+    assert second_page["next_cursor"] is None
+
+@pytest.mark.asyncio
+async def test_get_user_stats(client: AsyncClient, admin_headers):
+    response = await client.get("/users/stats", headers=admin_headers)
+    assert response.status_code == 200
+    assert set(response.json()) == {"total", "verified", "unverified", "admins", "deleted"}
+
+def stats_delta(before: dict, after: dict) -> dict:
+    return {name: after[name] - before[name] for name in after if after[name] != before[name]}
+
+@pytest.mark.asyncio
+async def test_verify_updates_user_stats(client: AsyncClient, db_session):
+    await client.post("/auth/signup", json={"email": "verify@example.com", "password": "password123"})
+    user = await views.get_user_by_email(db_session, "verify@example.com")
+    before = await user_stats.get_user_stats(db_session)
+    response = await client.post("/auth/verify", json={"email": user.email, "code": user.verification_code})
+    assert response.status_code == 200
+    after = await user_stats.get_user_stats(db_session)
+    assert stats_delta(before, after) == {"verified": 1, "unverified": -1}
+
+@pytest.mark.asyncio
+async def test_set_user_role_updates_user_stats(client: AsyncClient, db_session, admin_headers, test_user):
+    before = await user_stats.get_user_stats(db_session)
+    await client.patch(
+        f"/users/{test_user.id}/role", headers=admin_headers, json={"role": "admin", "user_id": test_user.id}
+    )
+    after = await user_stats.get_user_stats(db_session)
+    assert stats_delta(before, after) == {"admins": 1}
+
+@pytest.mark.asyncio
+async def test_delete_user_updates_user_stats(client: AsyncClient, db_session, admin_headers, test_user):
+    before = await user_stats.get_user_stats(db_session)
+    await client.delete(f"/users/{test_user.id}", headers=admin_headers)
+    after = await user_stats.get_user_stats(db_session)
+    assert stats_delta(before, after) == {"total": -1, "verified": -1}
+
+@pytest.mark.asyncio
+async def test_delete_unverified_users_updates_user_stats(db_session, monkeypatch):
+    db_session.add(models.User(
+        email="stale@example.com",
+        hashed_password="hashedpassword",
+        created_at=datetime.now(settings.tzinfo) - timedelta(minutes=settings.UNVERIFIED_USER_LIFETIME_MINUTES + 1),
+    ))
+    await db_session.commit()
+    monkeypatch.setattr(user_tasks, "AsyncSessionLocal", lambda: db_session)
+
+    before = await user_stats.get_user_stats(db_session)
+    await user_tasks.async_delete_unverified_users()
+    after = await user_stats.get_user_stats(db_session)
+    assert stats_delta(before, after) == {"total": -1, "unverified": -1, "deleted": 1}
+
+@pytest.mark.asyncio
+async def test_get_user_stats_query_budget(client: AsyncClient, admin_headers, query_counter):
+    # auth lookup + one read of the counters table, no COUNT(*) over users
+    with query_counter.budget(2):
+        response = await client.get("/users/stats", headers=admin_headers)
+    assert response.status_code == 200
+
+@pytest.mark.asyncio
+async def test_signup_updates_user_stats(client: AsyncClient, admin_headers):
+    response = await client.post("/auth/signup", json={"email": "stats@example.com", "password": "password123"})
+    assert response.status_code == 201
+    response = await client.get("/users/stats", headers=admin_headers)
+    assert response.json()["unverified"] == 1
+
+@pytest_asyncio.fixture
+async def deleted_user(db_session):
+    user = models.User(
+        email="deleted@example.com",
+        hashed_password="hashedpassword",
+        is_deleted=True,
+        deleted_at=datetime.now(settings.tzinfo) - timedelta(days=settings.DELETED_USER_ARCHIVE_AFTER_DAYS + 1),
+    )
+    db_session.add(user)
+    await db_session.commit()
+    # Requests get a fresh session; don't let session.get() hit the identity map
+    db_session.expunge(user)
+    return user
+
+@pytest.mark.asyncio
+async def test_deleted_user_is_hidden(client: AsyncClient, admin_headers, deleted_user):
+    response = await client.get(f"/users/{deleted_user.id}", headers=admin_headers)
+    assert response.status_code == 404
+    response = await client.get("/users/", headers=admin_headers)
+    assert deleted_user.email not in [u["email"] for u in response.json()]
+
+@pytest.mark.asyncio
+async def test_deleted_user_cannot_authenticate(client: AsyncClient, deleted_user):
+    token = create_access_token({"sub": deleted_user.email})
+    response = await client.get("/users/me", headers={"Authorization": f"Bearer {token}"})
+    assert response.status_code == 404
+
+@pytest.mark.asyncio
+async def test_signup_reuses_deleted_email(client: AsyncClient, deleted_user):
+    response = await client.post("/auth/signup", json={"email": deleted_user.email, "password": "password123"})
+    assert response.status_code == 201
+    assert response.json()["id"] != deleted_user.id
+
+@pytest.mark.asyncio
+async def test_archive_deleted_users(db_session, deleted_user, test_user, monkeypatch):
+    monkeypatch.setattr(user_tasks, "AsyncSessionLocal", lambda: db_session)
+    before = await user_stats.get_user_stats(db_session)
+    await user_tasks.async_archive_deleted_users()
+    after = await user_stats.get_user_stats(db_session)
+    assert stats_delta(before, after) == {"deleted": -1}
+
+    archived = await db_session.get(models.UserArchive, deleted_user.id)
+    assert archived.email == deleted_user.email
+    remaining = await db_session.execute(select(models.User).execution_options(include_deleted=True))
+    assert [u.id for u in remaining.scalars()] == [test_user.id]
+
+@pytest.mark.asyncio
+async def test_reconcile_user_stats_counts_deleted(db_session, deleted_user, test_user):
+    stats = await user_stats.reconcile_user_stats(db_session)
+    assert stats == {"total": 1, "verified": 1, "unverified": 0, "admins": 0, "deleted": 1}
+
+@pytest.mark.asyncio
+async def test_reconcile_user_stats_corrects_drift(db_session, test_user):
+    await db_session.execute(update(models.UserCounter).values(value=99))
+    await db_session.commit()
+    stats = await user_stats.reconcile_user_stats(db_session)
+    assert await user_stats.get_user_stats(db_session) == stats